@@ -1,12 +1,35 @@
 from __future__ import annotations
 
+import tempfile
 from collections import defaultdict
 from datetime import datetime
+from enum import IntEnum
+from functools import lru_cache
+from hashlib import md5
+from itertools import groupby
 from pathlib import Path
+from time import monotonic
 
-from flask import Flask, flash, redirect, render_template, request, url_for
+from flask import Flask, Response, flash, render_template, request, session, url_for
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import UniqueConstraint
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import Index, UniqueConstraint, event, insert, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+try:  # orjson is unavailable under PyPy; fall back to the stdlib encoder.
+    import orjson
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+except ImportError:
+    import json
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "performance_review.db"
@@ -14,10 +37,60 @@ DB_PATH = BASE_DIR / "performance_review.db"
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# A small pool of long-lived connections keeps SQLite's page cache warm across
+# requests; the generous busy timeout rides out writer lock contention.
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "connect_args": {"check_same_thread": False, "timeout": 30},
+    "pool_size": 16,
+    "max_overflow": 0,
+}
 app.config["SECRET_KEY"] = "dev-secret-key-change-me"
 
+# Persist compiled templates so gunicorn workers (and restarts) skip Jinja's
+# parse/compile step on first hit instead of each paying it separately.
+_JINJA_CACHE_DIR = Path(tempfile.gettempdir()) / "jinja_cache"
+_JINJA_CACHE_DIR.mkdir(exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+    directory=str(_JINJA_CACHE_DIR), pattern="%s.cache"
+)
+app.jinja_env.auto_reload = False
+app.jinja_env.cache_size = 1000
+
 db = SQLAlchemy(app)
 
+_SQLITE_PRAGMAS = (
+    "journal_mode=WAL",  # readers no longer block behind the writer
+    "synchronous=NORMAL",  # safe with WAL; avoids an fsync per commit
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "cache_size=-20000",  # ~20 MB page cache
+    "foreign_keys=ON",
+)
+
+
+def _set_sqlite_pragmas(dbapi_conn, _connection_record) -> None:
+    cursor = dbapi_conn.cursor()
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+class AnswerBy(IntEnum):
+    """Bit-packed responder target: BOTH is REVIEWER | REVIEWEE.
+
+    Stored as a SMALLINT so hot filters compare integers instead of TEXT and
+    the answer indexes stay compact.
+    """
+
+    REVIEWER = 1
+    REVIEWEE = 2
+    BOTH = 3
+
+
+# Form values / URL segments use the lowercase names; codes live in the DB.
+_ROLE_CODES = {"reviewer": AnswerBy.REVIEWER, "reviewee": AnswerBy.REVIEWEE}
+_ANSWER_BY_CODES = {**_ROLE_CODES, "both": AnswerBy.BOTH}
+
 
 class Staff(db.Model):
     __tablename__ = "staff"
@@ -28,7 +101,10 @@ class Staff(db.Model):
     email = db.Column(db.String(200), nullable=False, unique=True)
     manager_id = db.Column(db.Integer, db.ForeignKey("staff.id"), nullable=True)
 
-    manager = db.relationship("Staff", remote_side=[id], backref="reports", lazy=True)
+    manager = db.relationship("Staff", remote_side=[id], back_populates="reports")
+    # The org chart groups staff by manager_id itself; lazy="raise" guards
+    # against accidentally re-introducing per-node lazy loads.
+    reports = db.relationship("Staff", back_populates="manager", lazy="raise")
 
 
 class ReviewTemplate(db.Model):
@@ -46,11 +122,13 @@ class TemplateQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     template_id = db.Column(db.Integer, db.ForeignKey("review_templates.id"), nullable=False)
     prompt = db.Column(db.Text, nullable=False)
-    answer_by = db.Column(db.String(20), nullable=False)  # reviewer, reviewee, both
+    answer_by = db.Column(db.SmallInteger, nullable=False)  # AnswerBy code
     order_index = db.Column(db.Integer, nullable=False, default=0)
 
     template = db.relationship("ReviewTemplate", backref="questions")
 
+    __table_args__ = (Index("ix_tq_template_order", "template_id", "order_index"),)
+
 
 class Review(db.Model):
     __tablename__ = "reviews"
@@ -66,6 +144,12 @@ class Review(db.Model):
     template = db.relationship("ReviewTemplate")
     reviewer = db.relationship("Staff", foreign_keys=[reviewer_id])
     reviewee = db.relationship("Staff", foreign_keys=[reviewee_id])
+    answers = db.relationship("ReviewAnswer", back_populates="review")
+
+    __table_args__ = (
+        Index("ix_reviews_status", "status"),
+        Index("ix_reviews_created_at", "created_at"),
+    )
 
 
 class ReviewAnswer(db.Model):
@@ -74,24 +158,107 @@ class ReviewAnswer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     review_id = db.Column(db.Integer, db.ForeignKey("reviews.id"), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey("template_questions.id"), nullable=False)
-    role = db.Column(db.String(20), nullable=False)  # reviewer, reviewee
+    role = db.Column(db.SmallInteger, nullable=False)  # AnswerBy.REVIEWER or .REVIEWEE
     answer_text = db.Column(db.Text, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    review = db.relationship("Review", backref="answers")
-    question = db.relationship("TemplateQuestion")
+    review = db.relationship("Review", back_populates="answers")
+    # Pages render answers against the cached question rows keyed by id, so
+    # per-answer traversal of this relationship would mean silent N+1 loads;
+    # lazy="raise" keeps it that way, like Staff.reports.
+    question = db.relationship("TemplateQuestion", lazy="raise")
+
+    __table_args__ = (
+        UniqueConstraint("review_id", "question_id", "role", name="uq_answer_per_role"),
+        Index("ix_ra_review_role", "review_id", "role"),
+    )
+
+
+# Read-mostly pages (dashboard, org chart) are cached whole for a short TTL.
+# The ETag derives from a one-query change stamp over the tables these pages
+# read, so revalidation stays correct across workers and restarts; the TTL
+# only bounds how long a rendered body is reused for a given stamp.
+_PAGE_CACHE_TTL = 30.0
+_page_cache: dict[str, tuple[str, str, float]] = {}
+
+_PAGE_STAMP_SQL = text(
+    "SELECT (SELECT COUNT(*) FROM staff),"
+    " (SELECT COUNT(*) FROM review_templates),"
+    " (SELECT COUNT(*) FROM reviews),"
+    " (SELECT COUNT(*) FROM reviews WHERE status = 'Completed'),"
+    " (SELECT MAX(created_at) FROM reviews)"
+)
+
+
+def _page_etag(endpoint: str) -> str:
+    stamp = db.session.execute(_PAGE_STAMP_SQL).one()
+    digest = md5("|".join(map(str, stamp)).encode()).hexdigest()[:16]
+    return f'"{endpoint}-{digest}"'
+
 
-    __table_args__ = (UniqueConstraint("review_id", "question_id", "role", name="uq_answer_per_role"),)
+def _fast_redirect(url: str) -> Response:
+    """Minimal 302 to a fixed, known-safe path.
+
+    Skips werkzeug redirect()'s HTML body generation and URL escaping. A
+    fresh Response per call is still required: the session machinery appends
+    Set-Cookie headers, so a shared prebuilt instance would leak them across
+    requests.
+    """
+    response = Response(status=302)
+    response.headers["Location"] = url
+    return response
+
+
+def _cached_page(endpoint: str, render):
+    # Rendering consumes this user's flash messages, so a page built while
+    # flashes are pending is user-specific: serve it fresh and keep it out of
+    # the shared cache (and away from ETag revalidation).
+    if "_flashes" in session:
+        return render()
+
+    etag = _page_etag(endpoint)
+    if request.headers.get("If-None-Match") == etag:
+        return "", 304
+
+    entry = _page_cache.get(endpoint)
+    now = monotonic()
+    if entry is not None and entry[0] == etag and entry[2] > now:
+        html = entry[1]
+    else:
+        html = render()
+        _page_cache[endpoint] = (etag, html, now + _PAGE_CACHE_TTL)
+
+    response = app.make_response(html)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=30"
+    return response
 
 
 @app.route("/")
 def dashboard():
-    staff_count = Staff.query.count()
-    template_count = ReviewTemplate.query.count()
-    review_count = Review.query.count()
-    completed_count = Review.query.filter_by(status="Completed").count()
+    return _cached_page("dashboard", _render_dashboard)
 
-    latest_reviews = Review.query.order_by(Review.created_at.desc()).limit(8).all()
+
+def _render_dashboard() -> str:
+    staff_count, template_count, review_count, completed_count = db.session.execute(
+        text(
+            "SELECT (SELECT COUNT(*) FROM staff),"
+            " (SELECT COUNT(*) FROM review_templates),"
+            " (SELECT COUNT(*) FROM reviews),"
+            " (SELECT COUNT(*) FROM reviews WHERE status = 'Completed')"
+        )
+    ).one()
+
+    latest_reviews = (
+        Review.query.options(
+            selectinload(Review.reviewer),
+            selectinload(Review.reviewee),
+            selectinload(Review.template),
+        )
+        .order_by(Review.created_at.desc())
+        .limit(8)
+        .all()
+    )
     return render_template(
         "dashboard.html",
         staff_count=staff_count,
@@ -112,18 +279,21 @@ def staff():
 
         if not name or not title or not email:
             flash("Name, title, and email are required.", "danger")
-            return redirect(url_for("staff"))
-
-        if Staff.query.filter_by(email=email).first():
-            flash("A staff member with that email already exists.", "danger")
-            return redirect(url_for("staff"))
+            return _fast_redirect(_URLS["staff"])
 
         manager = Staff.query.get(int(manager_id)) if manager_id else None
         member = Staff(name=name, title=title, email=email, manager=manager)
         db.session.add(member)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Let the unique constraint arbitrate instead of a pre-check
+            # SELECT, which would race against concurrent writers anyway.
+            db.session.rollback()
+            flash("A staff member with that email already exists.", "danger")
+            return _fast_redirect(_URLS["staff"])
         flash("Staff member created.", "success")
-        return redirect(url_for("staff"))
+        return _fast_redirect(_URLS["staff"])
 
     members = Staff.query.order_by(Staff.name).all()
     return render_template("staff.html", members=members)
@@ -131,15 +301,43 @@ def staff():
 
 @app.route("/org-chart")
 def org_chart():
-    members = Staff.query.order_by(Staff.name).all()
-    by_manager: dict[int | None, list[Staff]] = defaultdict(list)
-    for member in members:
-        by_manager[member.manager_id].append(member)
+    return _cached_page("org_chart", _render_org_chart)
 
-    roots = sorted(by_manager[None], key=lambda m: m.name.lower())
+
+def _render_org_chart() -> str:
+    # Column tuples instead of Staff instances: the tree only needs
+    # id/name/title/manager_id, and a full ORM object per node costs an order
+    # of magnitude more heap. SQL ordering lets groupby do the grouping in
+    # one pass.
+    rows = db.session.execute(
+        select(Staff.id, Staff.name, Staff.title, Staff.manager_id).order_by(
+            Staff.manager_id.nulls_first(), Staff.name
+        )
+    ).all()
+    by_manager: dict[int | None, list] = {
+        manager_id: list(group)
+        for manager_id, group in groupby(rows, key=lambda row: row.manager_id)
+    }
+
+    roots = sorted(by_manager.get(None, []), key=lambda row: row.name.lower())
     return render_template("org_chart.html", roots=roots, by_manager=by_manager)
 
 
+@app.route("/org-chart.json")
+def org_chart_json():
+    """Org structure as JSON for client-side rendering of large orgs.
+
+    Skips both ORM hydration and Jinja: column tuples in, orjson out.
+    """
+    rows = db.session.execute(
+        select(Staff.id, Staff.name, Staff.title, Staff.manager_id).order_by(Staff.name)
+    ).all()
+    by_manager: dict[int | None, list[dict]] = defaultdict(list)
+    for staff_id, name, title, manager_id in rows:
+        by_manager[manager_id].append({"id": staff_id, "name": name, "title": title})
+    return app.response_class(_json_dumps(dict(by_manager)), mimetype="application/json")
+
+
 @app.route("/templates", methods=["GET", "POST"])
 def templates():
     if request.method == "POST":
@@ -150,39 +348,44 @@ def templates():
 
         if not name:
             flash("Template name is required.", "danger")
-            return redirect(url_for("templates"))
-
-        if ReviewTemplate.query.filter_by(name=name).first():
-            flash("Template name must be unique.", "danger")
-            return redirect(url_for("templates"))
+            return _fast_redirect(_URLS["templates"])
 
         template = ReviewTemplate(name=name, description=description)
         db.session.add(template)
-        db.session.flush()
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Template name must be unique.", "danger")
+            return _fast_redirect(_URLS["templates"])
 
-        valid_questions = 0
+        questions_payload = []
         for idx, prompt in enumerate(prompts):
-            text = prompt.strip()
-            answer_by = answer_by_values[idx] if idx < len(answer_by_values) else "both"
-            if not text:
+            prompt_text = prompt.strip()
+            answer_by_raw = answer_by_values[idx] if idx < len(answer_by_values) else "both"
+            if not prompt_text:
                 continue
-            valid_questions += 1
-            question = TemplateQuestion(
-                template_id=template.id,
-                prompt=text,
-                answer_by=answer_by,
-                order_index=valid_questions,
+            questions_payload.append(
+                {
+                    "template_id": template.id,
+                    "prompt": prompt_text,
+                    "answer_by": int(_ANSWER_BY_CODES.get(answer_by_raw, AnswerBy.BOTH)),
+                    "order_index": len(questions_payload) + 1,
+                }
             )
-            db.session.add(question)
 
-        if valid_questions == 0:
+        if not questions_payload:
             db.session.rollback()
             flash("Add at least one question.", "danger")
-            return redirect(url_for("templates"))
+            return _fast_redirect(_URLS["templates"])
 
+        # One multi-row INSERT and one commit: a template create costs a
+        # single fsync no matter how many questions it carries.
+        db.session.execute(insert(TemplateQuestion), questions_payload)
         db.session.commit()
+        _template_questions.cache_clear()
         flash("Template created.", "success")
-        return redirect(url_for("templates"))
+        return _fast_redirect(_URLS["templates"])
 
     all_templates = ReviewTemplate.query.order_by(ReviewTemplate.created_at.desc()).all()
     return render_template("templates.html", templates=all_templates)
@@ -198,11 +401,11 @@ def reviews():
 
         if not title or not template_id or not reviewer_id or not reviewee_id:
             flash("All fields are required to initiate a review.", "danger")
-            return redirect(url_for("reviews"))
+            return _fast_redirect(_URLS["reviews"])
 
         if reviewer_id == reviewee_id:
             flash("Reviewer and reviewee must be different staff members.", "danger")
-            return redirect(url_for("reviews"))
+            return _fast_redirect(_URLS["reviews"])
 
         review = Review(
             title=title,
@@ -213,9 +416,17 @@ def reviews():
         db.session.add(review)
         db.session.commit()
         flash("Review initiated.", "success")
-        return redirect(url_for("reviews"))
+        return _fast_redirect(_URLS["reviews"])
 
-    reviews_list = Review.query.order_by(Review.created_at.desc()).all()
+    reviews_list = (
+        Review.query.options(
+            joinedload(Review.reviewer),
+            joinedload(Review.reviewee),
+            joinedload(Review.template),
+        )
+        .order_by(Review.created_at.desc())
+        .all()
+    )
     templates_list = ReviewTemplate.query.order_by(ReviewTemplate.name).all()
     staff_members = Staff.query.order_by(Staff.name).all()
     return render_template(
@@ -226,51 +437,75 @@ def reviews():
     )
 
 
+@lru_cache(maxsize=256)
+def _template_questions(template_id: int) -> tuple:
+    """Questions for a template as plain column rows, ordered by order_index.
+
+    Template questions are immutable once created, so results are cached per
+    process; the templates POST handler clears the cache when a new template
+    lands.
+    """
+    return tuple(
+        db.session.execute(
+            select(TemplateQuestion.id, TemplateQuestion.prompt, TemplateQuestion.answer_by)
+            .where(TemplateQuestion.template_id == template_id)
+            .order_by(TemplateQuestion.order_index)
+        ).all()
+    )
+
+
 @app.route("/reviews/<int:review_id>/<role>", methods=["GET", "POST"])
 def complete_review(review_id: int, role: str):
     if role not in {"reviewer", "reviewee"}:
         flash("Invalid role.", "danger")
-        return redirect(url_for("reviews"))
+        return _fast_redirect(_URLS["reviews"])
 
     review = Review.query.get_or_404(review_id)
-    questions = (
-        TemplateQuestion.query.filter_by(template_id=review.template_id)
-        .order_by(TemplateQuestion.order_index)
-        .all()
-    )
+    role_code = int(_ROLE_CODES[role])
+    questions = _template_questions(review.template_id)
 
-    applicable = [q for q in questions if q.answer_by in {role, "both"}]
+    applicable = [q for q in questions if q.answer_by & role_code]
 
     if request.method == "POST":
+        now = datetime.utcnow()
+        rows = []
         for question in applicable:
             text = request.form.get(f"q_{question.id}", "").strip()
             if not text:
                 continue
-            answer = ReviewAnswer.query.filter_by(
-                review_id=review.id,
-                question_id=question.id,
-                role=role,
-            ).first()
-            if answer:
-                answer.answer_text = text
-            else:
-                db.session.add(
-                    ReviewAnswer(
-                        review_id=review.id,
-                        question_id=question.id,
-                        role=role,
-                        answer_text=text,
-                    )
-                )
+            rows.append(
+                {
+                    "review_id": review.id,
+                    "question_id": question.id,
+                    "role": role_code,
+                    "answer_text": text,
+                    "updated_at": now,
+                }
+            )
+
+        if rows:
+            stmt = sqlite_insert(ReviewAnswer).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["review_id", "question_id", "role"],
+                set_={
+                    "answer_text": stmt.excluded.answer_text,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            db.session.execute(stmt)
 
-        db.session.commit()
         evaluate_completion(review)
+        db.session.commit()
         flash(f"{role.title()} responses saved.", "success")
-        return redirect(url_for("reviews"))
+        return _fast_redirect(_URLS["reviews"])
 
     existing_answers = {
-        ans.question_id: ans.answer_text
-        for ans in ReviewAnswer.query.filter_by(review_id=review.id, role=role).all()
+        question_id: answer_text
+        for question_id, answer_text in db.session.execute(
+            select(ReviewAnswer.question_id, ReviewAnswer.answer_text).where(
+                ReviewAnswer.review_id == review.id, ReviewAnswer.role == role_code
+            )
+        )
     }
     return render_template(
         "complete_review.html",
@@ -283,42 +518,146 @@ def complete_review(review_id: int, role: str):
 
 @app.route("/reviews/<int:review_id>")
 def view_review(review_id: int):
-    review = Review.query.get_or_404(review_id)
-    questions = (
-        TemplateQuestion.query.filter_by(template_id=review.template_id)
-        .order_by(TemplateQuestion.order_index)
-        .all()
-    )
-    answers = ReviewAnswer.query.filter_by(review_id=review.id).all()
-
-    indexed_answers: dict[tuple[int, str], str] = {}
-    for answer in answers:
-        indexed_answers[(answer.question_id, answer.role)] = answer.answer_text
+    review = Review.query.options(
+        joinedload(Review.reviewer), joinedload(Review.reviewee)
+    ).get_or_404(review_id)
+    questions = _template_questions(review.template_id)
+    # Plain column tuples: the page only needs (question_id, role) -> text,
+    # so skip ORM instance hydration for what can be hundreds of answer rows.
+    rows = db.session.execute(
+        select(ReviewAnswer.question_id, ReviewAnswer.role, ReviewAnswer.answer_text).where(
+            ReviewAnswer.review_id == review.id
+        )
+    ).all()
+    indexed_answers: dict[tuple[int, str], str] = {
+        (question_id, role): answer_text for question_id, role, answer_text in rows
+    }
 
     return render_template("review_detail.html", review=review, questions=questions, indexed_answers=indexed_answers)
 
 
-def evaluate_completion(review: Review) -> None:
-    questions = (
-        TemplateQuestion.query.filter_by(template_id=review.template_id)
-        .order_by(TemplateQuestion.order_index)
-        .all()
+# NOT EXISTS rather than a COUNT of gaps: SQLite stops at the first expected
+# pair without a non-empty answer instead of enumerating all of them.
+_REVIEW_COMPLETE_SQL = text(
+    """
+    WITH expected(question_id, role) AS (
+        SELECT id, 1 FROM template_questions
+        WHERE template_id = :template_id AND (answer_by & 1) != 0
+        UNION ALL
+        SELECT id, 2 FROM template_questions
+        WHERE template_id = :template_id AND (answer_by & 2) != 0
     )
-    expected_pairs: list[tuple[int, str]] = []
-    for question in questions:
-        if question.answer_by in {"reviewer", "both"}:
-            expected_pairs.append((question.id, "reviewer"))
-        if question.answer_by in {"reviewee", "both"}:
-            expected_pairs.append((question.id, "reviewee"))
-
-    actual_pairs = {
-        (answer.question_id, answer.role)
-        for answer in ReviewAnswer.query.filter_by(review_id=review.id).all()
-        if answer.answer_text.strip()
-    }
+    SELECT NOT EXISTS (
+        SELECT 1 FROM expected e
+        WHERE NOT EXISTS (
+            SELECT 1 FROM review_answers ra
+            WHERE ra.review_id = :review_id
+            AND ra.question_id = e.question_id
+            AND ra.role = e.role
+            AND TRIM(ra.answer_text) <> ''
+        )
+    )
+    """
+)
+
 
-    review.status = "Completed" if all(pair in actual_pairs for pair in expected_pairs) else "In Progress"
+def evaluate_completion(review: Review) -> None:
+    """Recompute review.status inside the caller's transaction (no commit here)."""
+    complete = db.session.execute(
+        _REVIEW_COMPLETE_SQL,
+        {"template_id": review.template_id, "review_id": review.id},
+    ).scalar()
+    review.status = "Completed" if complete else "In Progress"
+
+
+@app.cli.command("migrate-indexes")
+def migrate_indexes():
+    """Create the hot-path indexes on a database that predates them."""
+    statements = (
+        "CREATE INDEX IF NOT EXISTS ix_tq_template_order ON template_questions (template_id, order_index)",
+        "CREATE INDEX IF NOT EXISTS ix_reviews_status ON reviews (status)",
+        "CREATE INDEX IF NOT EXISTS ix_reviews_created_at ON reviews (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_ra_review_role ON review_answers (review_id, role)",
+    )
+    for statement in statements:
+        db.session.execute(text(statement))
     db.session.commit()
+    print("Indexes are up to date.")
+
+
+@app.cli.command("migrate-role-codes")
+def migrate_role_codes():
+    """Rebuild tables that predate the integer answer_by/role codes.
+
+    SQLite cannot retype a column in place (the old TEXT affinity would keep
+    converting the codes back to strings), so rename the legacy tables,
+    create the new schema, and copy the rows across with the string values
+    mapped to their codes — all in a single transaction.
+    """
+    # Probe the declared column types, not row contents: an empty legacy
+    # table still has TEXT affinity, which would silently coerce the new
+    # integer codes back to strings on insert.
+    declared_types = (
+        db.session.execute(
+            text(
+                "SELECT type FROM pragma_table_info('template_questions') WHERE name = 'answer_by'"
+                " UNION ALL"
+                " SELECT type FROM pragma_table_info('review_answers') WHERE name = 'role'"
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if all("INT" in declared.upper() for declared in declared_types):
+        print("Role codes are already up to date.")
+        return
+    # Release the probe's read transaction so the rebuild below is not
+    # blocked waiting on our own connection.
+    db.session.rollback()
+
+    # The whole rebuild runs as one transaction on one raw connection: a
+    # failure at any step rolls back to the intact legacy schema and the
+    # command can simply be re-run. The foreign-key pragma must be issued
+    # outside the transaction to take effect; it stays off while rows move
+    # between the renamed tables.
+    conn = db.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        cursor.execute("BEGIN")
+        cursor.execute("ALTER TABLE template_questions RENAME TO template_questions_old")
+        cursor.execute("ALTER TABLE review_answers RENAME TO review_answers_old")
+        # Named indexes (from migrate-indexes) follow their renamed tables;
+        # drop them so the CREATEs below can re-issue them on the new tables.
+        cursor.execute("DROP INDEX IF EXISTS ix_tq_template_order")
+        cursor.execute("DROP INDEX IF EXISTS ix_ra_review_role")
+        for table in (TemplateQuestion.__table__, ReviewAnswer.__table__):
+            cursor.execute(str(CreateTable(table).compile(db.engine)))
+            for index in table.indexes:
+                cursor.execute(str(CreateIndex(index).compile(db.engine)))
+        cursor.execute(
+            "INSERT INTO template_questions (id, template_id, prompt, answer_by, order_index)"
+            " SELECT id, template_id, prompt, CASE answer_by"
+            " WHEN 'reviewer' THEN 1 WHEN 'reviewee' THEN 2 WHEN 'both' THEN 3"
+            " ELSE answer_by END, order_index"
+            " FROM template_questions_old"
+        )
+        cursor.execute(
+            "INSERT INTO review_answers (id, review_id, question_id, role, answer_text, updated_at)"
+            " SELECT id, review_id, question_id, CASE role"
+            " WHEN 'reviewer' THEN 1 WHEN 'reviewee' THEN 2 ELSE role END, answer_text, updated_at"
+            " FROM review_answers_old"
+        )
+        cursor.execute("DROP TABLE template_questions_old")
+        cursor.execute("DROP TABLE review_answers_old")
+        conn.commit()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+    finally:
+        # Closing with the transaction still open (any failure above) rolls
+        # it back, leaving the legacy schema untouched.
+        conn.close()
+    print("Role codes are up to date.")
 
 
 @app.cli.command("seed")
@@ -337,19 +676,40 @@ def seed_data():
     db.session.add(template)
     db.session.flush()
 
-    db.session.add_all(
+    db.session.execute(
+        insert(TemplateQuestion),
         [
-            TemplateQuestion(template_id=template.id, prompt="What were your key achievements this period?", answer_by="reviewee", order_index=1),
-            TemplateQuestion(template_id=template.id, prompt="How effectively did this employee collaborate with peers?", answer_by="reviewer", order_index=2),
-            TemplateQuestion(template_id=template.id, prompt="What growth goals should be prioritized next quarter?", answer_by="both", order_index=3),
-        ]
+            {"template_id": template.id, "prompt": "What were your key achievements this period?", "answer_by": int(AnswerBy.REVIEWEE), "order_index": 1},
+            {"template_id": template.id, "prompt": "How effectively did this employee collaborate with peers?", "answer_by": int(AnswerBy.REVIEWER), "order_index": 2},
+            {"template_id": template.id, "prompt": "What growth goals should be prioritized next quarter?", "answer_by": int(AnswerBy.BOTH), "order_index": 3},
+        ],
     )
 
     db.session.commit()
     print("Seed data created.")
 
 
+# The no-argument page URLs never change after route registration; build them
+# once so hot redirect paths skip Werkzeug's URL builder entirely.
+with app.test_request_context():
+    _URLS = {
+        name: url_for(name)
+        for name in ("dashboard", "staff", "org_chart", "templates", "reviews")
+    }
+
+
+@app.context_processor
+def _inject_urls():
+    return {"URLS": _URLS, "AnswerBy": AnswerBy}
+
+
+@app.template_filter("answer_by_label")
+def answer_by_label(code: int) -> str:
+    return AnswerBy(code).name.lower()
+
+
 with app.app_context():
+    event.listen(db.engine, "connect", _set_sqlite_pragmas)
     db.create_all()
 
 
@@ -0,0 +1,13 @@
+"""Gunicorn configuration for running the app under PyPy (or CPython).
+
+Workers are long-lived on purpose: PyPy's tracing JIT needs warm-up before the
+Flask/Jinja/SQLAlchemy hot paths are compiled, so recycling workers frequently
+(max_requests) would throw that work away.
+"""
+
+bind = "0.0.0.0:5000"
+workers = 4
+threads = 2
+timeout = 60
+max_requests = 0  # never recycle workers; keeps the JIT warm
+accesslog = "-"